@@ -5,57 +5,114 @@ This is the main file that runs your web server.
 It connects HTML pages to Python logic to MySQL database.
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-from flask_mysqldb import MySQL
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+from flask import (Flask, Blueprint, Response, current_app, render_template, request, jsonify,
+                   session, redirect, stream_with_context, url_for)
+from werkzeug.local import LocalProxy
 from werkzeug.security import generate_password_hash, check_password_hash
-import MySQLdb.cursors
 
-# ── Create the Flask app ──
-app = Flask(__name__)
+from config import PLACEHOLDER_SECRET_KEYS, load_config
+from db import Database
+from sharding import ShardRouter, ShardUnavailable
 
-# ── Secret key for sessions (CHANGE THIS to something random) ──
-app.secret_key = 'your-super-secret-key-change-this-to-anything-random'
+# ── The current app's main database (no connection opens until a route needs one) ──
+# It holds the user directory, and is also the only shard unless SHARDS is set in .env.
+mysql = LocalProxy(lambda: current_app.extensions['database'])
 
-# ── MySQL Configuration ──
-app.config['MYSQL_HOST'] = 'localhost'
-app.config['MYSQL_USER'] = 'root'
-app.config['MYSQL_PASSWORD'] = 'ilensys@123'     # ← YOUR MySQL password
-app.config['MYSQL_DB'] = 'task_manager_db'
-app.config['MYSQL_CURSORCLASS'] = 'DictCursor'
+# ── The current app's router: finds which shard database each user's rows live on ──
+shards = LocalProxy(lambda: current_app.extensions['shards'])
 
-# ── Initialize MySQL ──
-mysql = MySQL(app)
+# ── All routes live on this blueprint; create_app() attaches it ──
+bp = Blueprint('main', __name__)
+
+
+# ============================================================
+#  APP FACTORY
+# ============================================================
+
+def create_app(config=None):
+    """
+    Build and return the Flask app.
+
+    Settings come from .env / environment (see config.py). Pass a dict to
+    override any of them, e.g. create_app({'MYSQL_DB': 'test_db'}).
+    Each app gets its own connection pools (app.extensions['database'] and
+    app.extensions['shards']). Nothing connects here — connections open on first use.
+    """
+    app = Flask(__name__)
+    app.config.update(load_config())
+    if config:
+        app.config.update(config)
+
+    if not app.config['SECRET_KEY'] or app.config['SECRET_KEY'] in PLACEHOLDER_SECRET_KEYS:
+        if not (app.config.get('DEBUG') or app.config.get('TESTING')):
+            raise RuntimeError('SECRET_KEY is not set (or is the example value) — put a long random value in .env.')
+        # Development only: a random key, so sessions just reset on restart
+        app.config['SECRET_KEY'] = os.urandom(32).hex()
+
+    database = Database(
+        app.config,
+        pool_size=app.config['DB_POOL_SIZE'],
+        warm_connections=app.config['DB_WARM_CONNECTIONS'],
+    )
+    database.init_app(app)
+    app.extensions['database'] = database
+    ShardRouter(database, app)
+
+    app.register_blueprint(bp)
+    return app
+
+
+def warm_up(app):
+    """
+    Pre-load templates and open pooled DB connections for this worker.
+    Call once per worker after forking (see gunicorn.conf.py).
+    """
+    with app.app_context():
+        for name in app.jinja_env.list_templates():
+            if name.endswith('.html'):
+                app.jinja_env.get_template(name)
+        database = app.extensions['database']
+        database.warm()
+        for db in app.extensions['shards'].shards.values():
+            if db is not database:
+                db.warm()
 
 
 # ============================================================
 #  PAGE ROUTES — These serve your HTML pages
 # ============================================================
 
-@app.route('/')
+@bp.route('/')
 def home():
     """Home page — redirect to dashboard if logged in, else login."""
     if 'user_id' in session:
-        return redirect(url_for('dashboard'))
-    return redirect(url_for('login_page'))
+        return redirect(url_for('main.dashboard'))
+    return redirect(url_for('main.login_page'))
 
 
-@app.route('/login')
+@bp.route('/login')
 def login_page():
     """Show the login page."""
     return render_template('login.html')
 
 
-@app.route('/register')
+@bp.route('/register')
 def register_page():
     """Show the registration page."""
     return render_template('register.html')
 
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 def dashboard():
     """Show the dashboard (only if logged in)."""
     if 'user_id' not in session:
-        return redirect(url_for('login_page'))
+        return redirect(url_for('main.login_page'))
     return render_template('dashboard.html')
 
 
@@ -64,7 +121,7 @@ def dashboard():
 # ============================================================
 
 # ── REGISTER ──
-@app.route('/api/register', methods=['POST'])
+@bp.route('/api/register', methods=['POST'])
 def api_register():
     """Register a new user."""
     data = request.get_json()
@@ -82,24 +139,40 @@ def api_register():
     try:
         cursor = mysql.connection.cursor()
 
-        # Check if username exists
-        cursor.execute('SELECT id FROM users WHERE username = %s', (username,))
+        # Check if username exists (the directory knows every user on every shard)
+        cursor.execute('SELECT user_id FROM user_directory WHERE username = %s', (username,))
         if cursor.fetchone():
             return jsonify({'message': 'Username already taken.', 'success': False}), 409
 
         # Check if email exists
-        cursor.execute('SELECT id FROM users WHERE email = %s', (email,))
+        cursor.execute('SELECT user_id FROM user_directory WHERE email = %s', (email,))
         if cursor.fetchone():
             return jsonify({'message': 'Email already registered.', 'success': False}), 409
 
-        # Hash the password and save
-        password_hash = generate_password_hash(password)
+        # Pick an id and a shard, and claim the username/email in the directory first
+        user_id = shards.ids.next_id()
+        shard_name = shards.shard_name_for_new_user(user_id)
         cursor.execute(
-            'INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)',
-            (username, email, password_hash)
+            'INSERT INTO user_directory (user_id, username, email, shard) VALUES (%s, %s, %s, %s)',
+            (user_id, username, email, shard_name)
         )
         mysql.connection.commit()
 
+        # Hash the password and save the user on their shard
+        password_hash = generate_password_hash(password)
+        db = shards.shards[shard_name]
+        try:
+            db.connection.cursor().execute(
+                'INSERT INTO users (id, username, email, password_hash) VALUES (%s, %s, %s, %s)',
+                (user_id, username, email, password_hash)
+            )
+            db.connection.commit()
+        except Exception:
+            # Give the username/email back if the shard write failed
+            cursor.execute('DELETE FROM user_directory WHERE user_id = %s', (user_id,))
+            mysql.connection.commit()
+            raise
+
         return jsonify({'message': 'Registration successful!', 'success': True}), 201
 
     except Exception as e:
@@ -107,7 +180,7 @@ def api_register():
 
 
 # ── LOGIN ──
-@app.route('/api/login', methods=['POST'])
+@bp.route('/api/login', methods=['POST'])
 def api_login():
     """Login and start a session."""
     data = request.get_json()
@@ -116,8 +189,14 @@ def api_login():
 
     try:
         cursor = mysql.connection.cursor()
-        cursor.execute('SELECT * FROM users WHERE username = %s', (username,))
-        user = cursor.fetchone()
+        cursor.execute('SELECT user_id FROM user_directory WHERE username = %s', (username,))
+        entry = cursor.fetchone()
+
+        user = None
+        if entry:
+            cursor = shards.for_user(entry['user_id']).connection.cursor()
+            cursor.execute('SELECT * FROM users WHERE id = %s', (entry['user_id'],))
+            user = cursor.fetchone()
 
         if user and check_password_hash(user['password_hash'], password):
             # Save user info in session (this is like a cookie on the server)
@@ -141,7 +220,7 @@ def api_login():
 
 
 # ── LOGOUT ──
-@app.route('/api/logout', methods=['POST'])
+@bp.route('/api/logout', methods=['POST'])
 def api_logout():
     """Clear the session."""
     session.clear()
@@ -149,7 +228,7 @@ def api_logout():
 
 
 # ── GET CURRENT USER ──
-@app.route('/api/me')
+@bp.route('/api/me')
 def api_me():
     """Check who is currently logged in."""
     if 'user_id' in session:
@@ -165,14 +244,14 @@ def api_me():
 
 
 # ── GET ALL TASKS for logged-in user ──
-@app.route('/api/tasks', methods=['GET'])
+@bp.route('/api/tasks', methods=['GET'])
 def api_get_tasks():
     """Get all tasks for the logged-in user."""
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not logged in.'}), 401
 
     try:
-        cursor = mysql.connection.cursor()
+        cursor = shards.for_user(session['user_id']).connection.cursor()
         cursor.execute(
             'SELECT * FROM tasks WHERE user_id = %s ORDER BY created_at DESC',
             (session['user_id'],)
@@ -191,7 +270,7 @@ def api_get_tasks():
 
 
 # ── CREATE A TASK ──
-@app.route('/api/tasks', methods=['POST'])
+@bp.route('/api/tasks', methods=['POST'])
 def api_create_task():
     """Create a new task."""
     if 'user_id' not in session:
@@ -205,12 +284,13 @@ def api_create_task():
         return jsonify({'message': 'Task title cannot be empty.', 'success': False}), 400
 
     try:
-        cursor = mysql.connection.cursor()
+        db = shards.for_user(session['user_id'], write=True)
+        cursor = db.connection.cursor()
         cursor.execute(
-            'INSERT INTO tasks (title, content, user_id) VALUES (%s, %s, %s)',
-            (title, content, session['user_id'])
+            'INSERT INTO tasks (id, title, content, user_id) VALUES (%s, %s, %s, %s)',
+            (shards.ids.next_id(), title, content, session['user_id'])
         )
-        mysql.connection.commit()
+        db.connection.commit()
 
         return jsonify({'message': 'Task created!', 'success': True}), 201
 
@@ -219,7 +299,7 @@ def api_create_task():
 
 
 # ── UPDATE A TASK ──
-@app.route('/api/tasks/<int:task_id>', methods=['PUT'])
+@bp.route('/api/tasks/<int:task_id>', methods=['PUT'])
 def api_update_task(task_id):
     """Update a task's title and content."""
     if 'user_id' not in session:
@@ -233,7 +313,8 @@ def api_update_task(task_id):
         return jsonify({'message': 'Task title cannot be empty.', 'success': False}), 400
 
     try:
-        cursor = mysql.connection.cursor()
+        db = shards.for_user(session['user_id'], write=True)
+        cursor = db.connection.cursor()
 
         # Check task exists and belongs to user
         cursor.execute('SELECT * FROM tasks WHERE id = %s AND user_id = %s', (task_id, session['user_id']))
@@ -246,7 +327,7 @@ def api_update_task(task_id):
             'UPDATE tasks SET title = %s, content = %s WHERE id = %s AND user_id = %s',
             (new_title, new_content, task_id, session['user_id'])
         )
-        mysql.connection.commit()
+        db.connection.commit()
 
         return jsonify({'message': 'Task updated!', 'success': True}), 200
 
@@ -255,14 +336,15 @@ def api_update_task(task_id):
 
 
 # ── DELETE A TASK ──
-@app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
+@bp.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def api_delete_task(task_id):
     """Delete a task."""
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not logged in.'}), 401
 
     try:
-        cursor = mysql.connection.cursor()
+        db = shards.for_user(session['user_id'], write=True)
+        cursor = db.connection.cursor()
 
         cursor.execute('SELECT * FROM tasks WHERE id = %s AND user_id = %s', (task_id, session['user_id']))
         task = cursor.fetchone()
@@ -271,7 +353,7 @@ def api_delete_task(task_id):
             return jsonify({'message': 'Task not found.', 'success': False}), 404
 
         cursor.execute('DELETE FROM tasks WHERE id = %s AND user_id = %s', (task_id, session['user_id']))
-        mysql.connection.commit()
+        db.connection.commit()
 
         return jsonify({'message': 'Task deleted.', 'success': True}), 200
 
@@ -280,14 +362,15 @@ def api_delete_task(task_id):
 
 
 # ── TOGGLE TASK (done/not done) ──
-@app.route('/api/tasks/<int:task_id>/toggle', methods=['PUT'])
+@bp.route('/api/tasks/<int:task_id>/toggle', methods=['PUT'])
 def api_toggle_task(task_id):
     """Toggle the done status of a task."""
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Not logged in.'}), 401
 
     try:
-        cursor = mysql.connection.cursor()
+        db = shards.for_user(session['user_id'], write=True)
+        cursor = db.connection.cursor()
 
         cursor.execute('SELECT * FROM tasks WHERE id = %s AND user_id = %s', (task_id, session['user_id']))
         task = cursor.fetchone()
@@ -300,7 +383,7 @@ def api_toggle_task(task_id):
             'UPDATE tasks SET done = %s WHERE id = %s AND user_id = %s',
             (new_done, task_id, session['user_id'])
         )
-        mysql.connection.commit()
+        db.connection.commit()
 
         status = "done" if new_done else "not done"
         return jsonify({'message': f'Task marked as {status}.', 'success': True}), 200
@@ -309,8 +392,270 @@ def api_toggle_task(task_id):
         return jsonify({'message': 'Server error.', 'success': False}), 500
 
 
+# ============================================================
+#  EXPORT / IMPORT — backups and moving many tasks at once
+# ============================================================
+
+EXPORT_COLUMNS = ['id', 'title', 'content', 'done', 'created_at']
+
+# Last line of an NDJSON export: {"export_complete": true, "rows": 123}.
+# No such line → the download was cut off. Import skips it.
+EXPORT_END_KEY = 'export_complete'
+
+TITLE_MAX_LENGTH = 200      # tasks.title is VARCHAR(200)
+
+
+def export_row(task):
+    """A task row as a plain dict with JSON-friendly values."""
+    return {
+        'id': task['id'],
+        'title': task['title'],
+        'content': task['content'],
+        'done': bool(task['done']),
+        'created_at': task['created_at'].strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+# ── EXPORT all tasks as NDJSON (default) or CSV ──
+@bp.route('/api/tasks/export', methods=['GET'])
+def api_export_tasks():
+    """
+    Stream every task of the logged-in user, newest first.
+    ?format=ndjson → one JSON object per line;  ?format=csv → CSV with a header row.
+    Rows are read from a server-side cursor in small batches, so memory
+    stays flat no matter how many tasks there are.
+
+    The query runs BEFORE the 200 is sent, so a database error is a normal
+    500 (503 while rebalance.py is moving the user). A download can still be
+    cut off later, so check it is complete: the X-Task-Count header has the
+    number of rows, and an NDJSON export ends with an EXPORT_END_KEY line.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in.'}), 401
+
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'message': 'Format must be ndjson or csv.', 'success': False}), 400
+
+    user_id = session['user_id']
+    fetch_size = current_app.config['EXPORT_FETCH_SIZE']
+
+    try:
+        # Wait out a move like a write does, so the whole export comes from one shard
+        db = shards.for_user(user_id, write=True)
+
+        cursor = db.connection.cursor()
+        cursor.execute('SELECT COUNT(*) AS n FROM tasks WHERE user_id = %s', (user_id,))
+        total = cursor.fetchone()['n']
+
+        cursor = db.server_side_cursor()
+        cursor.execute(
+            'SELECT * FROM tasks WHERE user_id = %s ORDER BY created_at DESC',
+            (user_id,)
+        )
+    except ShardUnavailable:
+        return jsonify({'message': 'Your tasks are being moved — try again in a minute.',
+                        'success': False}), 503
+    except Exception as e:
+        return jsonify({'message': 'Server error.', 'success': False}), 500
+
+    def generate():
+        rows_sent = 0
+        try:
+            if export_format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+                writer.writeheader()
+                yield buffer.getvalue()
+
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+
+                if export_format == 'csv':
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerows(export_row(task) for task in rows)
+                    yield buffer.getvalue()
+                else:
+                    yield ''.join(json.dumps(export_row(task)) + '\n' for task in rows)
+                rows_sent += len(rows)
+
+            if export_format == 'ndjson':
+                yield json.dumps({EXPORT_END_KEY: True, 'rows': rows_sent}) + '\n'
+        finally:
+            cursor.close()
+
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename=tasks.{export_format}',
+            'X-Task-Count': str(total),
+        },
+    )
+
+
+def parse_import_row(row):
+    """
+    Check one uploaded task. Returns (values for INSERT, None) or (None, error message).
+    Only title is required; id in the upload is ignored (a new one is made).
+    """
+    if not isinstance(row, dict):
+        return None, 'Each row must be an object.'
+
+    title = str(row.get('title') or '').strip()
+    if not title:
+        return None, 'Task title cannot be empty.'
+    if len(title) > TITLE_MAX_LENGTH:
+        return None, f'Task title can be at most {TITLE_MAX_LENGTH} characters.'
+
+    content = str(row.get('content') or '').strip()
+
+    done = row.get('done', False)
+    if isinstance(done, str):
+        done = done.strip().lower() in ('1', 'true', 'yes')
+
+    created_at = row.get('created_at') or datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    try:
+        created_at = datetime.strptime(str(created_at), '%Y-%m-%dT%H:%M:%S')
+    except ValueError:
+        return None, 'created_at must look like 2024-01-31T09:30:00.'
+
+    return (title, content, bool(done), created_at.strftime('%Y-%m-%d %H:%M:%S')), None
+
+
+# Upload content type → format. Only a raw request body is accepted: Flask
+# reads a whole multipart/form-data body before request.files can be used.
+IMPORT_FORMATS = {
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/csv': 'csv',
+}
+
+
+def read_upload(import_format):
+    """
+    Yield the uploaded tasks one dict at a time, reading the raw request
+    body as it arrives (never all of it at once).
+    """
+    stream = request.stream
+    if isinstance(stream, io.RawIOBase):
+        stream = io.BufferedReader(stream)     # read in blocks, not byte by byte
+    lines = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+    if import_format == 'csv':
+        yield from csv.DictReader(lines)
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield None      # reported as a bad row
+            continue
+        if isinstance(row, dict) and EXPORT_END_KEY in row:
+            continue        # the last line of one of our own exports
+        yield row
+
+
+# ── IMPORT tasks from an NDJSON / CSV upload ──
+@bp.route('/api/tasks/import', methods=['POST'])
+def api_import_tasks():
+    """
+    Add many tasks at once. Send the file as the raw request body with
+    Content-Type application/x-ndjson or text/csv (not a multipart form).
+
+    Rows are inserted in chunks of IMPORT_CHUNK_SIZE, each chunk in its own
+    transaction. The response is NDJSON streamed while the import runs: one
+    progress line per chunk, then a final summary line with `success`.
+    Bad rows are skipped and reported (up to 20 of them).
+
+    Login, content type and the user's shard are checked BEFORE streaming
+    starts, so those fail with a normal 401 / 415 / 503. Once it has
+    started the status is already 200: if the import stops midway, only the
+    LAST line says so ("success": false). Chunks before it stay imported.
+    Clients must always read the last line.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Not logged in.'}), 401
+
+    import_format = IMPORT_FORMATS.get(request.mimetype)
+    if import_format is None:
+        return jsonify({
+            'message': 'Send the file as the request body with Content-Type '
+                       'application/x-ndjson or text/csv.',
+            'success': False,
+        }), 415
+
+    user_id = session['user_id']
+    try:
+        shards.for_user(user_id, write=True)
+    except ShardUnavailable:
+        return jsonify({'message': 'Your tasks are being moved — try again in a minute.',
+                        'success': False}), 503
+
+    chunk_size = current_app.config['IMPORT_CHUNK_SIZE']
+
+    def insert_chunk(chunk):
+        # Ask the directory again each chunk in case rebalance.py moved the user
+        db = shards.for_user(user_id, write=True, refresh=True)
+        try:
+            db.connection.cursor().executemany(
+                'INSERT INTO tasks (id, title, content, done, created_at, user_id) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                [(shards.ids.next_id(),) + values + (user_id,) for values in chunk]
+            )
+            db.connection.commit()
+        except Exception:
+            db.connection.rollback()
+            raise
+
+    def generate():
+        imported, skipped, errors, chunk = 0, 0, [], []
+
+        try:
+            for line_number, row in enumerate(read_upload(import_format), start=1):
+                values, error = parse_import_row(row)
+                if error:
+                    skipped += 1
+                    if len(errors) < 20:
+                        errors.append({'row': line_number, 'message': error})
+                    continue
+
+                chunk.append(values)
+                if len(chunk) >= chunk_size:
+                    insert_chunk(chunk)
+                    imported += len(chunk)
+                    chunk = []
+                    yield json.dumps({'imported': imported, 'skipped': skipped}) + '\n'
+
+            if chunk:
+                insert_chunk(chunk)
+                imported += len(chunk)
+
+        except Exception as e:
+            yield json.dumps({
+                'success': False, 'message': 'Server error — import stopped.',
+                'imported': imported, 'skipped': skipped, 'errors': errors,
+            }) + '\n'
+            return
+
+        yield json.dumps({
+            'success': True, 'message': f'Imported {imported} task(s).',
+            'imported': imported, 'skipped': skipped, 'errors': errors,
+        }) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 # ============================================================
 #  RUN THE APP
 # ============================================================
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+bench_export_import.py — Export / Import Throughput and Memory at Scale
+
+Seeds one user with N tasks in a throwaway SQLite database, then runs each
+step in a fresh Python process and prints its time, rows/second and peak
+RSS (the RSS of an idle app is shown too, so the difference is what the
+step itself used).
+
+    python bench_export_import.py                  # 1,000,000 tasks
+    python bench_export_import.py 100000           # smaller run
+    python bench_export_import.py 100000 --baseline
+
+Steps:
+    idle        create the app and log in, nothing else
+    export      GET /api/tasks/export (NDJSON), written to a file
+    export-csv  GET /api/tasks/export?format=csv
+    import      POST /api/tasks/import with the exported NDJSON file, as a new user
+    baseline    (--baseline) the old buffered GET /api/tasks, for comparison
+"""
+
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+PASSWORD = 'bench-password'
+
+
+def seed(path, count):
+    """Create the schema, user 'exporter' with `count` tasks, and an empty user 'importer'."""
+    os.environ.update({'DB_BACKEND': 'sqlite', 'SQLITE_PATH': path, 'SHARDS': ''})
+    from app import create_app, mysql
+    from migrations import DIRECTORY_MIGRATIONS, MIGRATIONS, migrate
+
+    app = create_app()
+    with app.app_context():
+        migrate(mysql.connection, 'sqlite', MIGRATIONS)
+        migrate(mysql.connection, 'sqlite', DIRECTORY_MIGRATIONS)
+    app.extensions['database'].close_all()
+
+    conn = sqlite3.connect(path)
+    password_hash = generate_password_hash(PASSWORD, method='pbkdf2')   # scrypt's RAM would hide ours
+    for user_id, username in ((1, 'exporter'), (2, 'importer')):
+        conn.execute('INSERT INTO users (id, username, email, password_hash) VALUES (?, ?, ?, ?)',
+                     (user_id, username, f'{username}@example.com', password_hash))
+        conn.execute("INSERT INTO user_directory (user_id, username, email, shard) VALUES (?, ?, ?, '0')",
+                     (user_id, username, f'{username}@example.com'))
+
+    start = datetime(2024, 1, 1)
+    batch = 50_000
+    for offset in range(0, count, batch):
+        conn.executemany(
+            'INSERT INTO tasks (id, title, content, done, created_at, user_id) VALUES (?, ?, ?, ?, ?, 1)',
+            [
+                (n + 1, f'Task number {n}', 'Some details about this task', n % 3 == 0,
+                 (start + timedelta(seconds=n)).strftime('%Y-%m-%d %H:%M:%S'))
+                for n in range(offset, min(offset + batch, count))
+            ]
+        )
+    conn.commit()
+    conn.close()
+
+
+# ============================================================
+#  CHILD PROCESS — runs one step and prints JSON
+# ============================================================
+
+def run_child(step, db_path, data_path):
+    os.environ.update({'DB_BACKEND': 'sqlite', 'SQLITE_PATH': db_path, 'SHARDS': ''})
+    from app import create_app
+
+    app = create_app({'TESTING': True})
+    client = app.test_client()
+    username = 'importer' if step == 'import' else 'exporter'
+    client.post('/api/login', json={'username': username, 'password': PASSWORD})
+
+    rows = 0
+    start = time.perf_counter()
+
+    if step in ('export', 'export-csv'):
+        url = '/api/tasks/export' + ('?format=csv' if step == 'export-csv' else '')
+        response = client.get(url, buffered=False)
+        with open(data_path if step == 'export' else os.devnull, 'wb') as out:
+            for chunk in response.response:
+                chunk = chunk.encode() if isinstance(chunk, str) else chunk
+                rows += chunk.count(b'\n')
+                out.write(chunk)
+        response.close()
+        rows -= 1       # CSV header / NDJSON end line
+
+    elif step == 'import':
+        with open(data_path, 'rb') as upload:
+            response = client.post(
+                '/api/tasks/import', input_stream=upload,
+                content_type='application/x-ndjson', content_length=os.path.getsize(data_path),
+                buffered=False,
+            )
+            last = b''
+            for chunk in response.response:
+                last = chunk.encode() if isinstance(chunk, str) else chunk
+            response.close()
+        rows = json.loads(last)['imported']
+
+    elif step == 'baseline':
+        rows = len(client.get('/api/tasks').get_json()['tasks'])
+
+    elapsed = time.perf_counter() - start
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'seconds': elapsed, 'rows': rows, 'rss_kb': rss_kb}))
+
+
+# ============================================================
+# ── RUN IT ──
+# ============================================================
+def main(count, baseline=False):
+    steps = ['idle', 'export', 'export-csv', 'import'] + (['baseline'] if baseline else [])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite3')
+        data_path = os.path.join(tmp, 'tasks.ndjson')
+
+        print(f"Seeding {count:,} tasks...")
+        seed(db_path, count)
+
+        print(f"{'step':<11} {'seconds':>8} {'rows':>10} {'rows/s':>10} {'peak RSS MB':>12}")
+        print('-' * 55)
+        for step in steps:
+            out = subprocess.run(
+                [sys.executable, __file__, '_child', step, db_path, data_path],
+                capture_output=True, text=True, check=True,
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            rate = result['rows'] / result['seconds'] if result['rows'] else 0
+            print(f"{step:<11} {result['seconds']:>8.2f} {result['rows']:>10,} {rate:>10,.0f} "
+                  f"{result['rss_kb'] / 1024:>12.1f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '_child':
+        run_child(*sys.argv[2:5])
+    else:
+        args = [a for a in sys.argv[1:] if not a.startswith('--')]
+        main(int(args[0]) if args else 1_000_000, baseline='--baseline' in sys.argv)
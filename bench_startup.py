@@ -0,0 +1,173 @@
+"""
+bench_startup.py — Measure Cold Start Time and Per-Worker Memory
+
+Part 1 starts a fresh Python process for each step so nothing is cached,
+and prints how long it took:
+    import       → `import app`
+    create_app   → `import app; create_app()`
+    warm         → create_app() + compile all templates (no DB needed)
+
+Part 2 starts real gunicorn servers (gunicorn.conf.py), with and without
+preload_app, against a throwaway SQLite file. It prints how long until the
+server answered, and the memory of each forked worker read from
+/proc/<pid>/smaps_rollup (Linux only):
+    USS  memory only this worker uses (what killing it would free)
+    PSS  USS + its fair share of pages shared with the master/other workers
+
+    python bench_startup.py            # 5 runs, 4 workers
+    python bench_startup.py 20 8       # 20 runs, 8 workers
+"""
+
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Code run inside each child process. Prints JSON: seconds taken.
+CHILD = '''
+import json, time
+start = time.perf_counter()
+import app
+{extra}
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+'''
+
+STEPS = {
+    'import': '',
+    'create_app': 'application = app.create_app({"TESTING": True})',
+    'warm': (
+        'application = app.create_app({"TESTING": True})\n'
+        'with application.app_context():\n'
+        '    for name in application.jinja_env.list_templates():\n'
+        '        application.jinja_env.get_template(name)'
+    ),
+}
+
+
+def run_step(code):
+    """Run `code` in a fresh interpreter and return its JSON measurement."""
+    out = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True, check=True, cwd=BASE_DIR,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ============================================================
+#  GUNICORN WORKERS
+# ============================================================
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def memory_kb(pid):
+    """{'rss': .., 'pss': .., 'uss': ..} in KB from /proc/<pid>/smaps_rollup."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'uss': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def worker_pids(master_pid):
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def measure_server(workers, preload):
+    """Start gunicorn, wait until it answers, then read every worker's memory."""
+    port = free_port()
+    url = f'http://127.0.0.1:{port}/api/me'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            GUNICORN_BIND=f'127.0.0.1:{port}',
+            GUNICORN_WORKERS=str(workers),
+            GUNICORN_PRELOAD='1' if preload else '0',
+            FLASK_DEBUG='0',                    # measure production mode, whatever .env says
+            SECRET_KEY=os.urandom(32).hex(),
+            DB_BACKEND='sqlite',
+            SQLITE_PATH=os.path.join(tmp, 'bench.sqlite3'),
+        )
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:create_app()'],
+            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            # Ready = first HTTP answer (401, nobody is logged in)
+            while True:
+                try:
+                    urllib.request.urlopen(url, timeout=1)
+                except urllib.error.HTTPError:
+                    break
+                except OSError:
+                    if server.poll() is not None:
+                        raise RuntimeError('gunicorn exited — is it installed?')
+                    time.sleep(0.01)
+            ready = time.perf_counter() - start
+
+            # Wait for every worker to boot, then send some traffic so they warm up
+            while len(worker_pids(server.pid)) < workers:
+                time.sleep(0.05)
+            time.sleep(1.0)
+            for _ in range(workers * 25):
+                try:
+                    urllib.request.urlopen(url, timeout=5)
+                except urllib.error.HTTPError:
+                    pass
+
+            master = memory_kb(server.pid)
+            per_worker = [memory_kb(pid) for pid in worker_pids(server.pid)]
+        finally:
+            server.terminate()
+            server.wait()
+
+    return ready, master, per_worker
+
+
+# ============================================================
+# ── RUN IT ──
+# ============================================================
+def main(runs=5, workers=4):
+    print(f"{'step':<12} {'median ms':>10} {'min ms':>8}")
+    print('-' * 32)
+    for name, extra in STEPS.items():
+        times = [run_step(CHILD.format(extra=extra))['seconds'] * 1000 for _ in range(runs)]
+        print(f'{name:<12} {statistics.median(times):>10.1f} {min(times):>8.1f}')
+
+    print()
+    print(f"gunicorn, {workers} workers (memory in MB, median over workers)")
+    print(f"{'mode':<12} {'ready s':>8} {'master RSS':>11} {'worker RSS':>11} {'worker PSS':>11} {'worker USS':>11}")
+    print('-' * 70)
+    for preload in (True, False):
+        ready, master, per_worker = measure_server(workers, preload)
+
+        def median(key):
+            return statistics.median(m[key] for m in per_worker) / 1024
+
+        print(f"{'preload' if preload else 'no preload':<12} {ready:>8.2f} {master['rss'] / 1024:>11.1f} "
+              f"{median('rss'):>11.1f} {median('pss'):>11.1f} {median('uss'):>11.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4)
@@ -5,11 +5,15 @@ Currently uses in-memory lists (for testing without MySQL).
 When you connect Flask + MySQL, replace these lists with actual MySQL queries.
 
 ============================================================
-MySQL TABLE STRUCTURES — Create these in MySQL Workbench
+MySQL TABLE STRUCTURES — for reference only
+Don't run these by hand: `python migrations.py` creates (and later
+changes) them, and remembers what it already did.
 ============================================================
 
+-- On EVERY shard (the main database is shard '0').
+-- The app inserts ids from sharding.IdGenerator; AUTO_INCREMENT is only kept for old rows.
 CREATE TABLE users (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
     username VARCHAR(50) NOT NULL UNIQUE,
     email VARCHAR(100) NOT NULL UNIQUE,
     password_hash VARCHAR(255) NOT NULL,
@@ -17,15 +21,26 @@ CREATE TABLE users (
 );
 
 CREATE TABLE tasks (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
     title VARCHAR(200) NOT NULL,
     content TEXT DEFAULT '',
     done BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    user_id INT NOT NULL,
+    user_id BIGINT NOT NULL,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 );
 
+-- plus index idx_tasks_user_created ON tasks (user_id, created_at)
+
+-- Only in the main database: which shard each user lives on
+CREATE TABLE user_directory (
+    user_id BIGINT PRIMARY KEY,
+    username VARCHAR(50) NOT NULL UNIQUE,
+    email VARCHAR(100) NOT NULL UNIQUE,
+    shard VARCHAR(50) NOT NULL,
+    moving BOOLEAN NOT NULL DEFAULT FALSE
+);
+
 ============================================================
 API ENDPOINTS — Your Flask routes should handle these:
 ============================================================
@@ -38,6 +53,8 @@ POST   /api/tasks             → create a new task
 PUT    /api/tasks/<id>        → update a task
 DELETE /api/tasks/<id>        → delete a task
 PUT    /api/tasks/<id>/toggle → toggle done/not done
+GET    /api/tasks/export      → download all tasks (NDJSON, or ?format=csv)
+POST   /api/tasks/import      → upload many tasks at once (NDJSON or CSV)
 
 ============================================================
 """
@@ -0,0 +1,326 @@
+"""
+db.py — Lazy MySQL Connection Pool
+
+Replaces `flask_mysqldb.MySQL(app)`, keeping the same usage in routes:
+    cursor = mysql.connection.cursor()
+    mysql.connection.commit()
+
+What it does differently:
+  • MySQLdb is only imported when the first connection is opened,
+    so importing the app (and forking workers) stays cheap.
+  • Each worker process keeps a small pool of open connections instead
+    of connecting and disconnecting on every request.
+  • After a fork, the child drops the connections it inherited from the
+    parent (sockets must never be shared between processes) and opens
+    its own on first use.
+
+Set DB_BACKEND=sqlite to run against a local SQLite file instead of MySQL
+(used by explain_check.py). Routes keep writing MySQL-style `%s` queries;
+the SQLite wrapper translates them.
+"""
+
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+
+from flask import g
+
+
+# ============================================================
+#  SQLITE STAND-IN — behaves like a MySQLdb DictCursor connection
+# ============================================================
+
+class SqliteCursor:
+    """Wraps a sqlite3 cursor: `%s` placeholders in, dict rows out."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace('%s', '?'), params)
+        return self._cursor.rowcount
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(sql.replace('%s', '?'), seq_of_params)
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [dict(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size):
+        return [dict(row) for row in self._cursor.fetchmany(size)]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class SqliteConnection:
+    """Wraps a sqlite3 connection with the MySQLdb methods the app uses."""
+
+    def __init__(self, path):
+        import sqlite3
+
+        self._conn = sqlite3.connect(
+            path,
+            detect_types=sqlite3.PARSE_DECLTYPES,   # TIMESTAMP columns → datetime
+            check_same_thread=False,
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA foreign_keys = ON')
+
+    def cursor(self):
+        return SqliteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self):
+        pass
+
+    def close(self):
+        self._conn.close()
+
+
+# ============================================================
+#  QUERY RECORDING — see Database.record_queries()
+# ============================================================
+
+class TracedCursor:
+    """Cursor wrapper that reports every statement before running it."""
+
+    def __init__(self, cursor, notify):
+        self._cursor = cursor
+        self._notify = notify
+
+    def execute(self, sql, params=()):
+        self._notify(sql, params)
+        return self._cursor.execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        if seq_of_params:
+            self._notify(sql, seq_of_params[0])
+        return self._cursor.executemany(sql, seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    """Connection wrapper whose cursors are TracedCursors."""
+
+    def __init__(self, conn, notify):
+        self._conn = conn
+        self._notify = notify
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._conn.cursor(*args, **kwargs), self._notify)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# ============================================================
+#  DATABASE — per-process connection pool
+# ============================================================
+
+# Every live Database, so a single fork hook can reset all of them
+_databases = weakref.WeakSet()
+
+
+def _reset_all_after_fork():
+    for database in list(_databases):
+        database.reset_after_fork()
+
+
+# Drop inherited connections in forked children (gunicorn, uwsgi, ...)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_all_after_fork)
+
+
+class Database:
+    """
+    Per-process pool of DB connections, handed out one per request.
+
+    `settings` holds DB_BACKEND plus SQLITE_PATH or the MYSQL_* keys —
+    usually `app.config` itself, or one entry of SHARDS (see sharding.py).
+    create_app() makes one per app and keeps it in app.extensions.
+    """
+
+    def __init__(self, settings, name='main', pool_size=5, warm_connections=1):
+        self.name = name
+        self.settings = settings
+        self.pool_size = pool_size
+        self.warm_connections = warm_connections
+        self._g_key = f'db_conn_{name}'
+        self._pool = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._listeners = []
+        _databases.add(self)
+
+    def init_app(self, app):
+        """Register the teardown hook. Does NOT connect to the database."""
+        app.teardown_appcontext(self._teardown)
+
+    # ── CONNECTING ──
+    def _connect(self):
+        """Open a brand new connection using this Database's settings."""
+        config = self.settings
+        if config['DB_BACKEND'] == 'sqlite':
+            return SqliteConnection(config['SQLITE_PATH'])
+
+        import MySQLdb
+        import MySQLdb.cursors
+
+        return MySQLdb.connect(
+            host=config['MYSQL_HOST'],
+            port=config['MYSQL_PORT'],
+            user=config['MYSQL_USER'],
+            passwd=config['MYSQL_PASSWORD'],
+            db=config['MYSQL_DB'],
+            cursorclass=getattr(MySQLdb.cursors, config['MYSQL_CURSORCLASS']),
+            charset='utf8mb4',
+        )
+
+    def _checkout(self):
+        """Take a live connection from the pool, or open a new one."""
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+
+        while True:
+            with self._lock:
+                conn = self._pool.pop() if self._pool else None
+            if conn is None:
+                return self._connect()
+            try:
+                conn.ping()
+                return conn
+            except Exception:
+                # Server closed it (timeout, restart) — throw it away and retry
+                self._close_quietly(conn)
+
+    def _checkin(self, conn):
+        """Give a connection back to the pool (or close it if the pool is full)."""
+        try:
+            conn.rollback()     # never leak a half-finished transaction
+        except Exception:
+            self._close_quietly(conn)
+            return
+
+        with self._lock:
+            if self._pid == os.getpid() and len(self._pool) < self.pool_size:
+                self._pool.append(conn)
+                return
+        self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # ── USED BY ROUTES ──
+    @property
+    def connection(self):
+        """The connection for the current request (opened on first use)."""
+        conn = g.get(self._g_key)
+        if conn is None:
+            conn = self._checkout()
+            setattr(g, self._g_key, conn)
+        if self._listeners:
+            return TracedConnection(conn, self._notify)
+        return conn
+
+    def server_side_cursor(self):
+        """
+        A cursor that streams rows from the server as you fetchmany() them,
+        instead of loading the whole result into memory first.
+        Read every row (or close it) before running another query.
+        """
+        if self.backend == 'sqlite':
+            return self.connection.cursor()     # sqlite3 already steps through rows lazily
+
+        import MySQLdb.cursors
+        return self.connection.cursor(MySQLdb.cursors.SSDictCursor)
+
+    @property
+    def backend(self):
+        """'mysql' or 'sqlite' — which kind of database this points at."""
+        return self.settings['DB_BACKEND']
+
+    def _teardown(self, exception):
+        conn = g.pop(self._g_key, None)
+        if conn is not None:
+            self._checkin(conn)
+
+    # ── QUERY RECORDING ──
+    def _notify(self, sql, params):
+        for listener in list(self._listeners):
+            listener(sql, params)
+
+    @contextmanager
+    def record_queries(self):
+        """
+        Collect every (sql, params) pair executed through `connection`:
+            with mysql.record_queries() as queries:
+                client.get('/api/tasks')
+            print(queries)
+        """
+        queries = []
+
+        def listener(sql, params):
+            queries.append((sql, params))
+
+        self._listeners.append(listener)
+        try:
+            yield queries
+        finally:
+            self._listeners.remove(listener)
+
+    # ── WORKER LIFECYCLE ──
+    def reset_after_fork(self):
+        """
+        Forget connections inherited from the parent process.
+        They are NOT closed here — closing would also close the parent's socket.
+        """
+        self._pool = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def warm(self, count=None):
+        """
+        Open `count` connections now so the first requests don't pay for it,
+        e.g. from a gunicorn `post_fork` hook.
+        """
+        count = self.warm_connections if count is None else count
+        count = min(count, self.pool_size)
+
+        opened = [self._checkout() for _ in range(count)]
+        for conn in opened:
+            self._checkin(conn)
+        return len(opened)
+
+    def close_all(self):
+        """Close every pooled connection (e.g. on worker exit)."""
+        with self._lock:
+            pool, self._pool = self._pool, []
+        for conn in pool:
+            self._close_quietly(conn)
@@ -0,0 +1,239 @@
+"""
+explain_check.py — Query Plan Regression Check
+
+Calls every /api/* route once (through Flask's test client), records each
+SQL statement the routes send, and runs EXPLAIN on it against a seeded
+database. Fails (exit code 1) when a statement would:
+  • read a whole table (full scan), or
+  • sort / build a temp table instead of reading rows in index order,
+on a table bigger than --max-rows.
+
+    python explain_check.py                      # throwaway SQLite file
+    python explain_check.py --users 500          # bigger seed
+    MYSQL_DB=task_check_db python explain_check.py --backend mysql
+
+With --backend mysql the seed data is written into MYSQL_DB — point it at
+a scratch database (MySQL or MariaDB), NOT the real one.
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app, mysql
+from migrations import DIRECTORY_MIGRATIONS, migrate
+
+
+CHECK_USER = {'username': 'plan_checker', 'email': 'plan_checker@example.com', 'password': 'checker123'}
+
+
+# ============================================================
+#  SEEDING
+# ============================================================
+
+def seed(conn, backend, users, tasks_per_user):
+    """Fill users/tasks with enough rows that a bad plan shows up."""
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) AS n FROM users')
+    if cursor.fetchone()['n'] >= users:
+        return
+
+    password_hash = generate_password_hash('seeded-password')
+    cursor.executemany(
+        'INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)',
+        [(f'seed_user_{i}', f'seed_user_{i}@example.com', password_hash) for i in range(users)]
+    )
+    cursor.execute('SELECT id, username, email FROM users')
+    users = cursor.fetchall()
+    cursor.executemany(
+        'INSERT INTO user_directory (user_id, username, email, shard) VALUES (%s, %s, %s, %s)',
+        [(user['id'], user['username'], user['email'], '0') for user in users]
+    )
+    user_ids = [user['id'] for user in users]
+
+    start = datetime(2024, 1, 1)
+    for user_id in user_ids:
+        cursor.executemany(
+            'INSERT INTO tasks (title, content, done, created_at, user_id) VALUES (%s, %s, %s, %s, %s)',
+            [
+                (f'Task {n}', 'seeded', n % 3 == 0,
+                 (start + timedelta(minutes=n * 7 + user_id)).strftime('%Y-%m-%d %H:%M:%S'), user_id)
+                for n in range(tasks_per_user)
+            ]
+        )
+    conn.commit()
+
+    # Let the planner see the new table sizes
+    cursor.execute('ANALYZE' if backend == 'sqlite' else 'ANALYZE TABLE users, tasks, user_directory')
+    cursor.fetchall()
+
+
+# ============================================================
+#  COLLECTING STATEMENTS
+# ============================================================
+
+def exercise_routes(client):
+    """Hit every /api/* route once, the way the dashboard does."""
+    client.post('/api/register', json=CHECK_USER)
+    client.post('/api/login', json={'username': CHECK_USER['username'], 'password': CHECK_USER['password']})
+    client.get('/api/me')
+    client.post('/api/tasks', json={'title': 'Check plans', 'content': 'from explain_check.py'})
+
+    tasks = client.get('/api/tasks').get_json()['tasks']
+    task_id = tasks[0]['id']
+    client.put(f'/api/tasks/{task_id}', json={'title': 'Check plans again', 'content': ''})
+    client.put(f'/api/tasks/{task_id}/toggle')
+    client.get('/api/tasks/export').get_data()
+    client.post('/api/tasks/import', data='{"title": "Imported"}\n', content_type='application/x-ndjson').get_data()
+    client.delete(f'/api/tasks/{task_id}')
+    client.post('/api/logout')
+
+
+def unique_statements(queries):
+    """Keep the first (sql, params) for each distinct SQL text."""
+    seen = {}
+    for sql, params in queries:
+        key = ' '.join(sql.split())
+        if key not in seen:
+            seen[key] = params
+    return list(seen.items())
+
+
+# ============================================================
+#  EXPLAIN
+# ============================================================
+
+SQLITE_PLAN_TABLE = re.compile(r'^(SCAN|SEARCH)( TABLE)? (\w+)')
+
+
+def table_exists(cursor, table):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", (table,))
+    return cursor.fetchone() is not None
+
+
+def table_rows(cursor, table):
+    cursor.execute(f'SELECT COUNT(*) AS n FROM {table}')
+    return cursor.fetchone()['n']
+
+
+def check_sqlite(cursor, sql, params, max_rows):
+    """EXPLAIN QUERY PLAN → (plan lines, problems)."""
+    cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+    details = [row['detail'] for row in cursor.fetchall()]
+
+    problems = []
+    biggest = 0
+    for detail in details:
+        # "SCAN tasks", "SEARCH tasks USING ..." (SQLite < 3.36 says "SCAN TABLE tasks").
+        # Lines like "SCAN CONSTANT ROW" or "SCAN SUBQUERY 1" aren't about a table.
+        match = SQLITE_PLAN_TABLE.match(detail)
+        if not match or match.group(3) in ('CONSTANT', 'SUBQUERY'):
+            continue
+        action, table = match.group(1), match.group(3)
+        if not table_exists(cursor, table):
+            continue        # an alias like "tasks t" — none of the app's queries use them
+
+        rows = table_rows(cursor, table)
+        biggest = max(biggest, rows)
+        if action == 'SCAN' and rows > max_rows:
+            problems.append(f'full scan of {table} ({rows} rows)')
+    for detail in details:
+        if 'TEMP B-TREE' in detail and biggest > max_rows:
+            problems.append(f'{detail.lower()} (up to {biggest} rows)')
+
+    return details, problems
+
+
+def check_mysql(cursor, sql, params, max_rows):
+    """EXPLAIN (MySQL / MariaDB) → (plan lines, problems)."""
+    cursor.execute('EXPLAIN ' + sql, params)
+    rows = cursor.fetchall()
+
+    details, problems = [], []
+    for row in rows:
+        table, access = row.get('table'), row.get('type')
+        estimate = int(row.get('rows') or 0)
+        extra = row.get('Extra') or ''
+        details.append(f'{table}: type={access} key={row.get("key")} rows={estimate} {extra}'.strip())
+
+        if estimate <= max_rows:
+            continue
+        if access in ('ALL', 'index'):
+            problems.append(f'full scan of {table} (~{estimate} rows)')
+        if 'filesort' in extra:
+            problems.append(f'filesort on {table} (~{estimate} rows)')
+        if 'temporary' in extra:
+            problems.append(f'temporary table for {table} (~{estimate} rows)')
+
+    return details, problems
+
+
+def check_plans(conn, backend, statements, max_rows):
+    """EXPLAIN every statement. Returns the number of statements that failed."""
+    cursor = conn.cursor()
+    check = check_sqlite if backend == 'sqlite' else check_mysql
+    failures = 0
+
+    for sql, params in statements:
+        if sql.split()[0].upper() == 'INSERT':
+            continue
+
+        details, problems = check(cursor, sql, params, max_rows)
+        failures += bool(problems)
+
+        print(f"[{'FAIL' if problems else ' OK '}] {sql}")
+        for line in details:
+            print(f"         plan: {line}")
+        for problem in problems:
+            print(f"         !! {problem}")
+
+    return failures
+
+
+# ============================================================
+# ── RUN IT ──
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='EXPLAIN every SQL statement the /api routes issue.')
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tasks-per-user', type=int, default=50)
+    parser.add_argument('--max-rows', type=int, default=100,
+                        help='scans/sorts over tables this small are allowed')
+    args = parser.parse_args(argv)
+
+    config = {'TESTING': True, 'DB_BACKEND': args.backend, 'SHARDS': {}}
+    tmp_dir = None
+    if args.backend == 'sqlite':
+        tmp_dir = tempfile.TemporaryDirectory()
+        config['SQLITE_PATH'] = os.path.join(tmp_dir.name, 'explain_check.sqlite3')
+
+    app = create_app(config)
+    try:
+        with app.app_context():
+            migrate(mysql.connection, args.backend)
+            migrate(mysql.connection, args.backend, DIRECTORY_MIGRATIONS)
+            seed(mysql.connection, args.backend, args.users, args.tasks_per_user)
+
+        with app.extensions['database'].record_queries() as queries:
+            exercise_routes(app.test_client())
+
+        with app.app_context():
+            failures = check_plans(mysql.connection, args.backend, unique_statements(queries), args.max_rows)
+    finally:
+        app.extensions['database'].close_all()
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    print()
+    print(f"{failures} statement(s) with a bad plan." if failures else "All query plans OK.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+gunicorn.conf.py — Production Server Settings
+
+Run with:
+    gunicorn "app:create_app()"
+
+The app is built ONCE in the master process (preload_app) and then forked,
+so every worker shares the same imported code pages instead of importing
+Flask and building the app again. Each worker then opens its own DB
+connections — the pool in db.py drops anything inherited from the master.
+
+Every worker also gets its own id "slot" (0-15) so the ids it makes can't
+clash with another worker on this server (see sharding.IdGenerator).
+A reload (kill -HUP) starts the new workers BEFORE the old ones stop, so
+at most 8 workers are allowed: old + new must fit in the 16 slots. Adding
+workers with kill -TTIN uses up the same slots.
+"""
+
+import os
+
+from sharding import MAX_WORKER_SLOT
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', '4'))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+# Half the slots, so a reload's new workers fit next to the old ones
+MAX_WORKERS = (MAX_WORKER_SLOT + 1) // 2
+
+if workers > MAX_WORKERS:
+    raise ValueError(f'GUNICORN_WORKERS can be at most {MAX_WORKERS} '
+                     f'(one id slot per worker, and reloads need room for two sets).')
+
+
+def pre_fork(server, worker):
+    """Runs in the master: give the new worker the lowest slot no live worker has."""
+    used = {getattr(w, 'id_slot', None) for w in server.WORKERS.values()}
+    free = set(range(MAX_WORKER_SLOT + 1)) - used
+    if not free:
+        raise RuntimeError(f'All {MAX_WORKER_SLOT + 1} id slots are taken by running workers — '
+                           f'too many workers (kill -TTIN?) or overlapping reloads. '
+                           f'Lower the worker count to {MAX_WORKERS} or less.')
+    worker.id_slot = min(free)
+
+
+def post_fork(server, worker):
+    """Runs inside each new worker: claim its id slot, compile templates and open DB connections."""
+    from app import warm_up
+
+    app = worker.app.wsgi()
+    # Not inside the try: a worker without a slot must not start
+    app.extensions['shards'].ids.assign_slot(worker.id_slot)
+
+    try:
+        warm_up(app)
+    except Exception as e:
+        # The DB may not be up yet — requests will connect on first use instead
+        worker.log.warning('Warm-up skipped: %s', e)
+
+
+def worker_exit(server, worker):
+    """Close this worker's pooled connections (main database and every shard) cleanly."""
+    # shards.shards includes the main database as shard '0'
+    for db in worker.app.wsgi().extensions['shards'].shards.values():
+        db.close_all()
@@ -0,0 +1,176 @@
+"""
+migrations.py — Database Schema Migrations
+
+Every schema change is a numbered step below. Applied steps are remembered
+in the `schema_migrations` table, so running this again only applies new ones.
+
+    python migrations.py                     # migrate the DB from .env
+    DB_BACKEND=sqlite python migrations.py   # migrate the local SQLite file
+
+Each step has a MySQL and a SQLite version of its statements.
+MIGRATIONS run on every shard (users + tasks); DIRECTORY_MIGRATIONS run on
+the main database, which holds the user directory (see sharding.py).
+The main database is always shard '0', so it gets both.
+"""
+
+# ── THE MIGRATIONS — append new ones at the end, never edit old ones ──
+MIGRATIONS = [
+    (
+        '001_create_users_and_tasks',
+        {
+            'mysql': [
+                """CREATE TABLE IF NOT EXISTS users (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    username VARCHAR(50) NOT NULL UNIQUE,
+                    email VARCHAR(100) NOT NULL UNIQUE,
+                    password_hash VARCHAR(255) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )""",
+                """CREATE TABLE IF NOT EXISTS tasks (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    title VARCHAR(200) NOT NULL,
+                    content TEXT DEFAULT '',
+                    done BOOLEAN DEFAULT FALSE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    user_id INT NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+                )""",
+            ],
+            'sqlite': [
+                """CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username VARCHAR(50) NOT NULL UNIQUE,
+                    email VARCHAR(100) NOT NULL UNIQUE,
+                    password_hash VARCHAR(255) NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )""",
+                """CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title VARCHAR(200) NOT NULL,
+                    content TEXT DEFAULT '',
+                    done BOOLEAN DEFAULT FALSE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    user_id INTEGER NOT NULL,
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+                )""",
+            ],
+        },
+    ),
+    (
+        # GET /api/tasks does `WHERE user_id = ? ORDER BY created_at DESC`.
+        # The FK index alone finds the rows but then sorts them (filesort);
+        # this index returns them already in order.
+        '002_index_tasks_user_id_created_at',
+        {
+            'mysql': ['CREATE INDEX idx_tasks_user_created ON tasks (user_id, created_at)'],
+            'sqlite': ['CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks (user_id, created_at)'],
+        },
+    ),
+    (
+        # IDs now come from sharding.IdGenerator (53-bit), which overflows INT.
+        # SQLite INTEGER is already 64-bit.
+        '003_bigint_ids',
+        {
+            'mysql': [
+                'ALTER TABLE tasks DROP FOREIGN KEY tasks_ibfk_1',
+                'ALTER TABLE users MODIFY id BIGINT NOT NULL AUTO_INCREMENT',
+                'ALTER TABLE tasks MODIFY id BIGINT NOT NULL AUTO_INCREMENT, MODIFY user_id BIGINT NOT NULL',
+                'ALTER TABLE tasks ADD CONSTRAINT tasks_ibfk_1 '
+                'FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE',
+            ],
+            'sqlite': [],
+        },
+    ),
+]
+
+# ── Main database only: where every user lives, found by id/username/email ──
+# Runs AFTER the main database's own MIGRATIONS (it reads its users table).
+DIRECTORY_MIGRATIONS = [
+    (
+        'directory_001_create_user_directory',
+        {
+            'mysql': [
+                """CREATE TABLE IF NOT EXISTS user_directory (
+                    user_id BIGINT PRIMARY KEY,
+                    username VARCHAR(50) NOT NULL UNIQUE,
+                    email VARCHAR(100) NOT NULL UNIQUE,
+                    shard VARCHAR(50) NOT NULL,
+                    moving BOOLEAN NOT NULL DEFAULT FALSE
+                )""",
+            ],
+            'sqlite': [
+                """CREATE TABLE IF NOT EXISTS user_directory (
+                    user_id INTEGER PRIMARY KEY,
+                    username VARCHAR(50) NOT NULL UNIQUE,
+                    email VARCHAR(100) NOT NULL UNIQUE,
+                    shard VARCHAR(50) NOT NULL,
+                    moving BOOLEAN NOT NULL DEFAULT FALSE
+                )""",
+            ],
+        },
+    ),
+    (
+        # Users from before sharding live in the main database, which is shard '0'
+        'directory_002_backfill_main_database_users',
+        {
+            'mysql': [
+                """INSERT INTO user_directory (user_id, username, email, shard)
+                   SELECT id, username, email, '0' FROM users
+                   WHERE id NOT IN (SELECT user_id FROM user_directory)""",
+            ],
+            'sqlite': [
+                """INSERT INTO user_directory (user_id, username, email, shard)
+                   SELECT id, username, email, '0' FROM users
+                   WHERE id NOT IN (SELECT user_id FROM user_directory)""",
+            ],
+        },
+    ),
+]
+
+
+def migrate(conn, backend='mysql', migrations=MIGRATIONS):
+    """
+    Apply every migration not yet recorded in `schema_migrations`.
+    `conn` is a raw connection (MySQLdb or db.SqliteConnection).
+    Returns the list of migration names that were applied.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        ' name VARCHAR(100) PRIMARY KEY,'
+        ' applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'
+    )
+    cursor.execute('SELECT name FROM schema_migrations')
+    done = {row['name'] for row in cursor.fetchall()}
+
+    applied = []
+    for name, statements in migrations:
+        if name in done:
+            continue
+        for sql in statements[backend]:
+            cursor.execute(sql)
+        cursor.execute('INSERT INTO schema_migrations (name) VALUES (%s)', (name,))
+        conn.commit()
+        applied.append(name)
+
+    return applied
+
+
+# ============================================================
+# ── RUN IT ──
+# ============================================================
+if __name__ == "__main__":
+    from app import create_app, mysql, shards
+
+    app = create_app()
+    with app.app_context():
+        # Shards first: the directory backfill reads the main database's users table
+        targets = [(f'shard {name}', db, MIGRATIONS) for name, db in shards.shards.items()]
+        targets += [('directory', mysql, DIRECTORY_MIGRATIONS)]
+
+        for label, db, migrations in targets:
+            applied = migrate(db.connection, db.backend, migrations)
+            for name in applied:
+                print(f"  [{label}] applied {name}")
+            if not applied:
+                print(f"  [{label}] up to date")
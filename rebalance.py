@@ -0,0 +1,263 @@
+"""
+rebalance.py — Move Users to the Shard the Hash Ring Says They Belong On
+
+Run after adding a shard to SHARDS in .env (and `python migrations.py`):
+
+    python rebalance.py              # move everyone who is on the wrong shard
+    python rebalance.py --dry-run    # only print what would move
+
+Run only ONE rebalance at a time. Each run:
+  1. clears `moving` flags left behind by a run that was killed
+  2. adds any user found on a shard but missing from the directory
+  3. sweeps away leftover copies: user/task rows on a shard the
+     directory does NOT point at (from a move that stopped halfway).
+     Tasks only the leftover copy has are copied over first.
+  4. moves every misplaced user
+so if a run dies for any reason, just run it again.
+
+Moving one user, while the site stays up:
+  1. mark the user `moving` in the directory — their writes now wait
+  2. wait --grace seconds for writes already in flight to finish
+  3. on the new shard: delete anything a failed earlier try left there,
+     then copy the user row + all their tasks (one transaction)
+  4. point the directory at the new shard and clear `moving`
+  5. copy any task that still reached the old shard (a slow write that
+     checked the directory just before step 1), then delete the old copy
+Reads keep working the whole time (from the old shard until step 4).
+"""
+
+import argparse
+import time
+
+from app import create_app, mysql, shards
+
+
+BATCH_SIZE = 500
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def users_on_shard(db):
+    """Yield lists of up to BATCH_SIZE {'id', 'username', 'email'} rows from one shard."""
+    last_id = -1
+    while True:
+        cursor = db.connection.cursor()
+        cursor.execute(
+            'SELECT id, username, email FROM users WHERE id > %s ORDER BY id LIMIT %s',
+            (last_id, BATCH_SIZE)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]['id']
+
+
+def directory_shards(user_ids):
+    """{user_id: shard name} for the given ids that are in the directory."""
+    cursor = mysql.connection.cursor()
+    cursor.execute(
+        f'SELECT user_id, shard FROM user_directory WHERE user_id IN ({placeholders(user_ids)})',
+        tuple(user_ids)
+    )
+    return {row['user_id']: row['shard'] for row in cursor.fetchall()}
+
+
+def clear_moving_flags():
+    """Un-stick users a killed run left marked as `moving` (their writes would wait forever)."""
+    cursor = mysql.connection.cursor()
+    cursor.execute('UPDATE user_directory SET moving = %s WHERE moving = %s', (False, True))
+    mysql.connection.commit()
+    return cursor.rowcount
+
+
+def backfill_directory():
+    """Add a directory row for every user found on a shard but not in the directory."""
+    added = 0
+    for name, db in shards.shards.items():
+        for users in users_on_shard(db):
+            known = directory_shards([user['id'] for user in users])
+            missing = [user for user in users if user['id'] not in known]
+            if missing:
+                mysql.connection.cursor().executemany(
+                    'INSERT INTO user_directory (user_id, username, email, shard) VALUES (%s, %s, %s, %s)',
+                    [(user['id'], user['username'], user['email'], name) for user in missing]
+                )
+                mysql.connection.commit()
+                added += len(missing)
+    return added
+
+
+def delete_user_rows(db, user_id):
+    """Delete one user and their tasks from `db` (not committed)."""
+    cursor = db.connection.cursor()
+    cursor.execute('DELETE FROM tasks WHERE user_id = %s', (user_id,))
+    cursor.execute('DELETE FROM users WHERE id = %s', (user_id,))
+
+
+def retire_copy(old, home, user_id):
+    """
+    Delete a user's copy on `old`, after copying any of its tasks that `home`
+    (the shard the directory points at) doesn't have. Ids are unique across
+    shards, so "missing on home" means "written to the old copy late".
+    Returns how many tasks were rescued.
+    """
+    rescued = copy_rows(old, home, 'tasks', 'user_id', user_id, skip_ids=task_ids(home, user_id))
+    home.connection.commit()
+
+    delete_user_rows(old, user_id)
+    old.connection.commit()
+    return rescued
+
+
+def sweep_orphans():
+    """Retire users (and their tasks) sitting on a shard the directory doesn't point them at."""
+    removed = 0
+    for name, db in shards.shards.items():
+        for users in users_on_shard(db):
+            known = directory_shards([user['id'] for user in users])
+            for user in users:
+                shard = known.get(user['id'])
+                if shard is not None and shard != name:
+                    retire_copy(db, shards.shards[shard], user['id'])
+                    removed += 1
+    return removed
+
+
+def set_moving(user_id, moving):
+    mysql.connection.cursor().execute(
+        'UPDATE user_directory SET moving = %s WHERE user_id = %s', (moving, user_id)
+    )
+    mysql.connection.commit()
+
+
+def task_ids(db, user_id):
+    """The set of this user's task ids on `db`."""
+    read = db.server_side_cursor()
+    try:
+        read.execute('SELECT id FROM tasks WHERE user_id = %s', (user_id,))
+        ids = set()
+        while True:
+            rows = read.fetchmany(BATCH_SIZE)
+            if not rows:
+                return ids
+            ids.update(row['id'] for row in rows)
+    finally:
+        read.close()
+
+
+def copy_rows(src, dst, table, where_column, user_id, skip_ids=frozenset()):
+    """
+    Copy every row of `table` for this user from src to dst, BATCH_SIZE rows
+    at a time. Rows whose id is in `skip_ids` are left out.
+    """
+    read = src.server_side_cursor()
+    try:
+        read.execute(f'SELECT * FROM {table} WHERE {where_column} = %s', (user_id,))
+        write = dst.connection.cursor()
+        copied = 0
+        while True:
+            rows = read.fetchmany(BATCH_SIZE)
+            if not rows:
+                return copied
+            rows = [row for row in rows if row['id'] not in skip_ids]
+            if not rows:
+                continue
+            columns = list(rows[0])
+            write.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders(columns)})",
+                [tuple(row[c] for c in columns) for row in rows]
+            )
+            copied += len(rows)
+    finally:
+        read.close()
+
+
+def move_user(user_id, src_name, dst_name, grace):
+    """Move one user and all their tasks from src_name to dst_name. Safe to run again if it fails."""
+    src, dst = shards.shards[src_name], shards.shards[dst_name]
+
+    set_moving(user_id, True)
+    try:
+        time.sleep(grace)
+
+        # Clear out a half-finished earlier copy, then copy (the user first — tasks point at it)
+        try:
+            delete_user_rows(dst, user_id)
+            copy_rows(src, dst, 'users', 'id', user_id)
+            task_count = copy_rows(src, dst, 'tasks', 'user_id', user_id)
+            dst.connection.commit()
+        except Exception:
+            dst.connection.rollback()
+            raise
+
+        # Switch the directory over — from now on the new shard is used
+        mysql.connection.cursor().execute(
+            'UPDATE user_directory SET shard = %s, moving = %s WHERE user_id = %s',
+            (dst_name, False, user_id)
+        )
+        mysql.connection.commit()
+    except Exception:
+        set_moving(user_id, False)
+        raise
+
+    # A write that read the directory just before `moving` was set, and took
+    # longer than --grace, can land on src AFTER the copy — rescue it, then
+    # delete the old copy (if this fails, the next run's sweep_orphans() does both)
+    return task_count + retire_copy(src, dst, user_id)
+
+
+def users_to_move():
+    """Yield (user_id, current shard, target shard) for every misplaced user."""
+    last_id = -1
+    while True:
+        cursor = mysql.connection.cursor()
+        cursor.execute(
+            'SELECT user_id, shard FROM user_directory WHERE user_id > %s ORDER BY user_id LIMIT %s',
+            (last_id, BATCH_SIZE)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        for row in rows:
+            target = shards.ring.get(row['user_id'])
+            if target != row['shard']:
+                yield row['user_id'], row['shard'], target
+        last_id = rows[-1]['user_id']
+
+
+# ============================================================
+# ── RUN IT ──
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Move users onto the shard the hash ring picks for them.')
+    parser.add_argument('--dry-run', action='store_true', help='print the moves, change nothing')
+    parser.add_argument('--grace', type=float, default=1.0,
+                        help='seconds to wait for in-flight writes before copying a user')
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        if not args.dry_run:
+            for label, count in (('un-stuck', clear_moving_flags()),
+                                 ('added to the directory', backfill_directory()),
+                                 ('leftover copies removed', sweep_orphans())):
+                if count:
+                    print(f"  {count} user(s) {label}")
+
+        moved = 0
+        for user_id, src, dst in list(users_to_move()):
+            if args.dry_run:
+                print(f"  would move user {user_id}: {src} → {dst}")
+            else:
+                tasks = move_user(user_id, src, dst, args.grace)
+                print(f"  moved user {user_id}: {src} → {dst} ({tasks} tasks)")
+            moved += 1
+
+        print(f"{moved} user(s) {'to move' if args.dry_run else 'moved'}.")
+
+
+if __name__ == "__main__":
+    main()
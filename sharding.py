@@ -0,0 +1,233 @@
+"""
+sharding.py — Spreading Users (and Their Tasks) Across Databases
+
+Every task query filters by the logged-in user, so each user and ALL of
+their tasks live together on one "shard" database. Pieces:
+
+  • HashRing     — consistent hashing: user_id → shard name. Adding a
+                   shard only moves ~1/N of the users.
+  • IdGenerator  — unique 53-bit IDs made in Python (no AUTO_INCREMENT),
+                   so two shards can never hand out the same id.
+  • ShardRouter  — the `user_directory` table in the main database says
+                   where each user lives (and lets login/register find
+                   users by username/email without asking every shard).
+
+The main database is ALWAYS shard '0' (it holds every user from before
+sharding). Add more shards in .env (names must never change once used):
+    SHARDS=a=mysql://root:pw@db-a/tasks,b=mysql://root:pw@db-b/tasks
+
+Upgrading / adding a shard — in this order:
+  1. set SHARDS (and a different ID_HOST_ID on every server) in .env
+  2. python migrations.py   — creates the tables on new shards, and fills
+                              user_directory with the users already in
+                              the main database
+  3. restart the app        — existing users keep working from shard '0'
+  4. python rebalance.py    — moves users to the shard the ring picks
+"""
+
+import bisect
+import hashlib
+import os
+import threading
+import time
+import weakref
+
+from flask import g
+
+from db import Database
+
+
+class ShardUnavailable(RuntimeError):
+    """A user's data is being moved and didn't finish in time."""
+
+
+# ============================================================
+#  CONSISTENT HASHING
+# ============================================================
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(str(key).encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Maps keys onto shard names; each shard gets `vnodes` points on the ring."""
+
+    def __init__(self, names, vnodes=100):
+        self._points = sorted((_hash(f'{name}#{i}'), name) for name in names for i in range(vnodes))
+        self._keys = [point for point, _ in self._points]
+
+    def get(self, key):
+        """The shard name that owns `key`."""
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._points[i][1]
+
+
+# ============================================================
+#  GLOBALLY UNIQUE IDS
+# ============================================================
+
+# 2024-01-01 00:00:00 UTC in milliseconds
+ID_EPOCH_MS = 1704067200000
+
+# 40 bits of milliseconds (~34 years) + 4 bits host + 4 bits worker slot + 5 bits sequence
+# = 53 bits, the largest integer JavaScript can hold exactly (the dashboard uses these ids).
+HOST_BITS = 4
+SLOT_BITS = 4
+SEQUENCE_BITS = 5
+MAX_HOST_ID = (1 << HOST_BITS) - 1          # 16 servers
+MAX_WORKER_SLOT = (1 << SLOT_BITS) - 1      # 16 worker processes per server (8 + a reload's 8)
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1     # 32 ids per millisecond per worker
+
+
+def _now_ms():
+    return int(time.time() * 1000) - ID_EPOCH_MS
+
+
+# Every live IdGenerator, so a single fork hook can reset all of them
+_generators = weakref.WeakSet()
+
+
+def _forget_all_slots_after_fork():
+    for generator in list(_generators):
+        generator._forget_slot()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_all_slots_after_fork)
+
+
+class IdGenerator:
+    """
+    Time-ordered unique ids: [milliseconds | host id | worker slot | sequence].
+
+    host_id (ID_HOST_ID in .env) must be different on every server, and the
+    worker slot different for every process on one server. A forked child
+    has NO slot until assign_slot() is called — next_id() raises instead of
+    silently reusing the parent's. gunicorn.conf.py hands out the slots.
+    """
+
+    def __init__(self, host_id=0, slot=0):
+        if not 0 <= host_id <= MAX_HOST_ID:
+            raise ValueError(f'ID_HOST_ID must be between 0 and {MAX_HOST_ID}, got {host_id}.')
+        self.host_id = host_id
+        self._lock = threading.Lock()
+        self.assign_slot(slot)
+        _generators.add(self)
+
+    def assign_slot(self, slot):
+        """Give this process its worker slot (0..MAX_WORKER_SLOT) on this host."""
+        if not 0 <= slot <= MAX_WORKER_SLOT:
+            raise ValueError(f'Worker slot must be between 0 and {MAX_WORKER_SLOT}, got {slot}.')
+        with self._lock:
+            self.slot = slot
+            self._last_ms = -1
+            self._sequence = 0
+
+    def _forget_slot(self):
+        self._lock = threading.Lock()
+        self.slot = None
+
+    def next_id(self):
+        """Returns a new unique id."""
+        with self._lock:
+            if self.slot is None:
+                raise RuntimeError('This forked process has no id worker slot — call assign_slot() first.')
+
+            now = _now_ms()
+            if now < self._last_ms:
+                now = self._last_ms          # clock went backwards — stay on the last tick
+
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # All ids of this millisecond are used — wait for the next one
+                    while now <= self._last_ms:
+                        now = _now_ms()
+            else:
+                self._sequence = 0
+
+            self._last_ms = now
+            worker = (self.host_id << SLOT_BITS) | self.slot
+            return (now << (HOST_BITS + SLOT_BITS + SEQUENCE_BITS)) | (worker << SEQUENCE_BITS) | self._sequence
+
+
+# ============================================================
+#  ROUTER
+# ============================================================
+
+class ShardRouter:
+    """Finds the shard database for a user."""
+
+    # How long a write waits for rebalance.py to finish moving its user
+    MOVE_WAIT_SECONDS = 5.0
+
+    def __init__(self, directory, app=None):
+        self.directory = directory
+        self.shards = {}
+        self.ring = None
+        self.ids = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Shard '0' is the main database; build one connection pool per extra shard."""
+        config = app.config
+        self.shards = {'0': self.directory}
+
+        for name, settings in config['SHARDS'].items():
+            if name == '0':
+                raise ValueError("Shard name '0' is reserved for the main database.")
+            db = Database(
+                settings, name=f'shard_{name}',
+                pool_size=config['DB_POOL_SIZE'], warm_connections=config['DB_WARM_CONNECTIONS'],
+            )
+            db.init_app(app)
+            self.shards[name] = db
+
+        self.ring = HashRing(self.shards, config['SHARD_VNODES'])
+        self.ids = IdGenerator(config['ID_HOST_ID'])
+        app.extensions['shards'] = self
+
+    # ── PLACEMENT ──
+    def shard_name_for_new_user(self, user_id):
+        """Where a brand new user should live."""
+        return self.ring.get(user_id)
+
+    def location(self, user_id, refresh=False):
+        """
+        Returns (shard name, moving) from the directory, or (None, False)
+        if the user isn't in it. Cached for the rest of the request
+        unless `refresh` is True.
+        """
+        cache = g.setdefault('shard_locations', {})
+        if refresh:
+            # Forget the cached answer and start a fresh transaction to see new rows
+            cache.pop(user_id, None)
+            self.directory.connection.rollback()
+        if user_id not in cache:
+            cursor = self.directory.connection.cursor()
+            cursor.execute('SELECT shard, moving FROM user_directory WHERE user_id = %s', (user_id,))
+            row = cursor.fetchone()
+            cache[user_id] = (row['shard'], bool(row['moving'])) if row else (None, False)
+        return cache[user_id]
+
+    def for_user(self, user_id, write=False, refresh=False):
+        """
+        The Database holding this user's rows.
+        Writes wait (up to MOVE_WAIT_SECONDS) while the user is being moved.
+        Long-running writers (e.g. imports) pass refresh=True before each batch.
+        """
+        name, moving = self.location(user_id, refresh)
+        if name is None:
+            return self.shards[self.ring.get(user_id)]
+
+        deadline = time.monotonic() + self.MOVE_WAIT_SECONDS
+        while write and moving:
+            if time.monotonic() > deadline:
+                raise ShardUnavailable(f'user {user_id} is being moved')
+            time.sleep(0.05)
+            name, moving = self.location(user_id, refresh=True)
+
+        return self.shards[name]
+
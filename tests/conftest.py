@@ -0,0 +1,48 @@
+"""
+Shared pytest fixtures: a throwaway app whose main database (shard '0')
+and extra shards are SQLite files in pytest's tmp_path.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from helpers import migrate_all  # noqa: E402
+
+
+def sqlite_settings(path):
+    return {'DB_BACKEND': 'sqlite', 'SQLITE_PATH': str(path)}
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """make_app('a', 'b') → an app with shards '0' (main), 'a' and 'b', tables not created yet."""
+    apps = []
+
+    def make(*shard_names):
+        app = create_app({
+            'TESTING': True,
+            'DB_BACKEND': 'sqlite',
+            'SQLITE_PATH': str(tmp_path / 'main.sqlite3'),
+            'SHARDS': {name: sqlite_settings(tmp_path / f'shard_{name}.sqlite3') for name in shard_names},
+            'ID_HOST_ID': 0,
+        })
+        apps.append(app)
+        return app
+
+    yield make
+
+    for app in apps:
+        for db in app.extensions['shards'].shards.values():
+            db.close_all()
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app('a')
+    migrate_all(app)
+    return app
@@ -0,0 +1,29 @@
+"""Plain helpers shared by the test modules (fixtures live in conftest.py)."""
+
+from migrations import DIRECTORY_MIGRATIONS, MIGRATIONS, migrate
+
+
+def migrate_all(app):
+    """What `python migrations.py` does: every shard, then the directory."""
+    shards = app.extensions['shards']
+    with app.app_context():
+        for db in shards.shards.values():
+            migrate(db.connection, 'sqlite', MIGRATIONS)
+        migrate(shards.directory.connection, 'sqlite', DIRECTORY_MIGRATIONS)
+
+
+def register(client, username, password='secret123'):
+    return client.post('/api/register', json={
+        'username': username, 'email': f'{username}@example.com', 'password': password,
+    })
+
+
+def login(client, username, password='secret123'):
+    return client.post('/api/login', json={'username': username, 'password': password})
+
+
+def rows(db, sql, params=()):
+    """Run a SELECT on a Database (inside an app context) and return all rows."""
+    cursor = db.connection.cursor()
+    cursor.execute(sql, params)
+    return cursor.fetchall()
@@ -0,0 +1,41 @@
+import pytest
+
+from app import create_app, warm_up
+from config import PLACEHOLDER_SECRET_KEYS
+
+
+def production_config(tmp_path, **overrides):
+    config = {'DEBUG': False, 'TESTING': False, 'DB_BACKEND': 'sqlite',
+              'SQLITE_PATH': str(tmp_path / 'main.sqlite3'), 'SHARDS': {}}
+    config.update(overrides)
+    return config
+
+
+@pytest.mark.parametrize('secret_key', [None, ''] + sorted(PLACEHOLDER_SECRET_KEYS))
+def test_production_app_refuses_a_missing_or_example_secret_key(tmp_path, secret_key):
+    with pytest.raises(RuntimeError, match='SECRET_KEY'):
+        create_app(production_config(tmp_path, SECRET_KEY=secret_key))
+
+
+def test_production_app_starts_with_a_real_secret_key(tmp_path):
+    app = create_app(production_config(tmp_path, SECRET_KEY='f' * 64))
+    assert not app.debug
+
+
+def test_testing_app_gets_a_random_key_instead_of_the_example(tmp_path):
+    app = create_app(production_config(tmp_path, TESTING=True, SECRET_KEY=sorted(PLACEHOLDER_SECRET_KEYS)[0]))
+    assert app.config['SECRET_KEY'] not in PLACEHOLDER_SECRET_KEYS
+
+
+def test_warm_up_compiles_every_page_template(app):
+    warm_up(app)
+
+    compiled = {name for _, name in app.jinja_env.cache.keys()}
+    assert {'login.html', 'register.html', 'dashboard.html'} <= compiled
+
+
+@pytest.mark.parametrize('page', ['/login', '/register'])
+def test_pages_render(app, page):
+    response = app.test_client().get(page)
+    assert response.status_code == 200
+    assert b'Task Manager' in response.data
@@ -0,0 +1,73 @@
+from werkzeug.security import generate_password_hash
+
+from helpers import login, migrate_all, register, rows
+from migrations import MIGRATIONS, migrate
+
+
+def test_register_puts_the_user_on_the_ring_shard_and_in_the_directory(app):
+    client = app.test_client()
+    names = [f'user{i}' for i in range(20)]
+    for name in names:
+        assert register(client, name).status_code == 201
+
+    shards = app.extensions['shards']
+    with app.app_context():
+        directory = rows(shards.directory, 'SELECT user_id, username, shard FROM user_directory')
+        assert sorted(entry['username'] for entry in directory) == sorted(names)
+        assert {entry['shard'] for entry in directory} == {'0', 'a'}    # 20 users land on both
+
+        for entry in directory:
+            assert entry['shard'] == shards.ring.get(entry['user_id'])
+            for name, db in shards.shards.items():
+                found = rows(db, 'SELECT id FROM users WHERE id = %s', (entry['user_id'],))
+                assert len(found) == (1 if name == entry['shard'] else 0)
+
+
+def test_register_rejects_a_username_taken_on_another_shard(app):
+    client = app.test_client()
+    assert register(client, 'alice').status_code == 201
+
+    response = client.post('/api/register', json={
+        'username': 'alice', 'email': 'other@example.com', 'password': 'secret123',
+    })
+    assert response.status_code == 409
+
+
+def test_login_and_tasks_go_through_the_directory(app):
+    client = app.test_client()
+    for name in ('alice', 'bob', 'carol', 'dave'):
+        register(client, name)
+
+        assert login(client, name).status_code == 200
+        assert client.post('/api/tasks', json={'title': f"{name}'s task"}).status_code == 201
+        tasks = client.get('/api/tasks').get_json()['tasks']
+        assert [task['title'] for task in tasks] == [f"{name}'s task"]
+        client.post('/api/logout')
+
+    assert login(client, 'alice', 'wrong-password').status_code == 401
+    assert login(client, 'nobody').status_code == 401
+
+
+def test_users_from_before_sharding_can_still_log_in(make_app):
+    """Upgrade path: one database with users → SHARDS set → migrations.py → login works."""
+    old_app = make_app()
+    with old_app.app_context():
+        db = old_app.extensions['database']
+        migrate(db.connection, 'sqlite', MIGRATIONS)
+        db.connection.cursor().execute(
+            'INSERT INTO users (username, email, password_hash) VALUES (%s, %s, %s)',
+            ('olduser', 'olduser@example.com', generate_password_hash('secret123'))
+        )
+        db.connection.commit()
+
+    new_app = make_app('a', 'b')
+    migrate_all(new_app)
+
+    with new_app.app_context():
+        directory = rows(new_app.extensions['database'], 'SELECT username, shard FROM user_directory')
+    assert [(entry['username'], entry['shard']) for entry in directory] == [('olduser', '0')]
+
+    client = new_app.test_client()
+    assert login(client, 'olduser').status_code == 200
+    assert client.post('/api/tasks', json={'title': 'still works'}).status_code == 201
+    assert len(client.get('/api/tasks').get_json()['tasks']) == 1
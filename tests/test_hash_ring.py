@@ -0,0 +1,29 @@
+from sharding import HashRing
+
+
+KEYS = range(20000)
+
+
+def test_same_key_always_maps_to_the_same_shard():
+    ring, reordered = HashRing(['0', 'a', 'b']), HashRing(['b', '0', 'a'])
+    assert [ring.get(key) for key in KEYS] == [reordered.get(key) for key in KEYS]
+
+
+def test_adding_a_shard_moves_about_one_nth_of_the_keys():
+    before = HashRing(['0', 'a', 'b'])
+    after = HashRing(['0', 'a', 'b', 'c'])
+
+    moved = [key for key in KEYS if before.get(key) != after.get(key)]
+
+    # Ideal is 1/4; vnodes keep it close
+    assert 0.18 < len(moved) / len(KEYS) < 0.32
+    # ...and only onto the new shard, never between the old ones
+    assert {after.get(key) for key in moved} == {'c'}
+
+
+def test_every_shard_gets_a_fair_share():
+    ring = HashRing(['0', 'a', 'b', 'c'])
+    counts = {}
+    for key in KEYS:
+        counts[ring.get(key)] = counts.get(ring.get(key), 0) + 1
+    assert all(0.18 < count / len(KEYS) < 0.32 for count in counts.values())
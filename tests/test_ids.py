@@ -0,0 +1,121 @@
+import json
+import os
+
+import pytest
+
+import sharding
+from sharding import MAX_HOST_ID, MAX_WORKER_SLOT, SEQUENCE_BITS, IdGenerator
+
+
+def fork_and_collect(work, count):
+    """Run work(i) in `count` forked children; returns what each one printed, as JSON."""
+    children = []
+    for i in range(count):
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            code = 0
+            try:
+                result = work(i)
+            except Exception as e:
+                result, code = repr(e), 1
+            with os.fdopen(write_end, 'w') as out:
+                json.dump(result, out)
+            os._exit(code)
+        os.close(write_end)
+        children.append((pid, read_end))
+
+    results = []
+    for pid, read_end in children:
+        with os.fdopen(read_end) as f:
+            results.append(json.load(f))
+        os.waitpid(pid, 0)
+    return results
+
+
+def millisecond(id_):
+    return id_ >> (sharding.HOST_BITS + sharding.SLOT_BITS + SEQUENCE_BITS)
+
+
+def sequence(id_):
+    return id_ & sharding.MAX_SEQUENCE
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_workers_with_their_own_slots_never_clash():
+    ids = IdGenerator(host_id=3)
+    ids.next_id()       # the parent has used it too, like a preloaded app
+
+    def worker(slot):
+        ids.assign_slot(slot)
+        return [ids.next_id() for _ in range(2000)]
+
+    batches = fork_and_collect(worker, 4)
+    all_ids = [id_ for batch in batches for id_ in batch]
+
+    assert len(all_ids) == 8000
+    assert len(set(all_ids)) == 8000
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_child_without_a_slot_refuses_to_make_ids():
+    ids = IdGenerator(host_id=3)
+
+    [result] = fork_and_collect(lambda i: ids.next_id(), 1)
+
+    assert 'RuntimeError' in result
+    assert ids.next_id()    # the parent keeps its slot
+
+
+def test_sequence_wraps_into_the_next_millisecond(monkeypatch):
+    calls = []
+
+    def fake_now():
+        calls.append(1)
+        return 1000 if len(calls) <= 40 else 1001
+
+    monkeypatch.setattr(sharding, '_now_ms', fake_now)
+    ids = IdGenerator()
+    made = [ids.next_id() for _ in range(sharding.MAX_SEQUENCE + 2)]
+
+    assert len(set(made)) == len(made)
+    assert made == sorted(made)
+    assert [millisecond(i) for i in made[:-1]] == [1000] * (sharding.MAX_SEQUENCE + 1)
+    assert [sequence(i) for i in made[:-1]] == list(range(sharding.MAX_SEQUENCE + 1))
+    # The 33rd id had to wait for the clock to move on
+    assert (millisecond(made[-1]), sequence(made[-1])) == (1001, 0)
+
+
+def test_clock_going_backwards_still_gives_bigger_ids(monkeypatch):
+    times = iter([1000, 990, 1001])
+    monkeypatch.setattr(sharding, '_now_ms', lambda: next(times))
+    ids = IdGenerator()
+
+    made = [ids.next_id() for _ in range(3)]
+
+    assert made == sorted(set(made))
+
+
+def test_host_and_slot_are_part_of_the_id(monkeypatch):
+    monkeypatch.setattr(sharding, '_now_ms', lambda: 1000)
+    a, b = IdGenerator(host_id=1, slot=2), IdGenerator(host_id=2, slot=1)
+    assert a.next_id() != b.next_id()
+
+
+def test_ids_fit_in_a_javascript_number():
+    assert IdGenerator(MAX_HOST_ID, MAX_WORKER_SLOT).next_id() < 2 ** 53
+
+
+@pytest.mark.parametrize('host_id, slot', [(MAX_HOST_ID + 1, 0), (-1, 0), (0, MAX_WORKER_SLOT + 1)])
+def test_out_of_range_host_or_slot_fails_loudly(host_id, slot):
+    with pytest.raises(ValueError):
+        IdGenerator(host_id, slot)
+
+
+def test_app_refuses_to_start_with_a_bad_host_id(tmp_path):
+    from app import create_app
+
+    with pytest.raises(ValueError, match='ID_HOST_ID'):
+        create_app({'TESTING': True, 'DB_BACKEND': 'sqlite', 'SQLITE_PATH': str(tmp_path / 'x.sqlite3'),
+                    'SHARDS': {}, 'ID_HOST_ID': MAX_HOST_ID + 1})
@@ -0,0 +1,123 @@
+import io
+import json
+
+from helpers import login, register
+
+
+def logged_in_client(app, username='alice'):
+    client = app.test_client()
+    register(client, username)
+    login(client, username)
+    return client
+
+
+def mark_moving(app, client):
+    """Mark the logged-in user as being moved by rebalance.py (and don't wait for it)."""
+    user_id = client.get('/api/me').get_json()['user']['id']
+    shards = app.extensions['shards']
+    shards.MOVE_WAIT_SECONDS = 0
+    with app.app_context():
+        shards.directory.connection.cursor().execute(
+            'UPDATE user_directory SET moving = %s WHERE user_id = %s', (True, user_id))
+        shards.directory.connection.commit()
+
+
+def import_lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_then_import_round_trip(app):
+    app.config['IMPORT_CHUNK_SIZE'] = 2
+    alice = logged_in_client(app, 'alice')
+    for n in range(5):
+        alice.post('/api/tasks', json={'title': f'task {n}', 'content': 'details'})
+    exported = alice.get('/api/tasks/export').get_data()
+
+    bob = logged_in_client(app, 'bob')
+    response = bob.post('/api/tasks/import', data=exported, content_type='application/x-ndjson')
+
+    assert response.status_code == 200
+    lines = import_lines(response)
+    assert [line['imported'] for line in lines] == [2, 4, 5]     # progress per chunk, then summary
+    assert (lines[-1]['success'], lines[-1]['skipped']) == (True, 0)     # the export's end line isn't a task
+    assert sorted(t['title'] for t in bob.get('/api/tasks').get_json()['tasks']) == [f'task {n}' for n in range(5)]
+
+
+def test_export_says_how_many_rows_and_where_it_ends(app):
+    client = logged_in_client(app)
+    for n in range(3):
+        client.post('/api/tasks', json={'title': f'task {n}'})
+
+    ndjson = client.get('/api/tasks/export')
+    lines = import_lines(ndjson)
+    assert ndjson.headers['X-Task-Count'] == '3'
+    assert lines[-1] == {'export_complete': True, 'rows': 3}
+    assert len(lines) == 4
+
+    csv_export = client.get('/api/tasks/export?format=csv')
+    assert csv_export.headers['X-Task-Count'] == '3'
+    assert len(csv_export.get_data(as_text=True).splitlines()) == 4      # header + 3 rows
+
+
+def test_export_database_error_is_a_500_not_an_empty_200(app, monkeypatch):
+    client = logged_in_client(app)
+
+    def broken():
+        raise RuntimeError('database went away')
+
+    for db in app.extensions['shards'].shards.values():
+        monkeypatch.setattr(db, 'server_side_cursor', broken)
+
+    assert client.get('/api/tasks/export').status_code == 500
+
+
+def test_export_while_the_user_is_being_moved_is_a_503(app):
+    client = logged_in_client(app)
+    mark_moving(app, client)
+
+    assert client.get('/api/tasks/export').status_code == 503
+
+
+def test_import_skips_titles_longer_than_the_column(app):
+    client = logged_in_client(app)
+    body = '\n'.join(json.dumps({'title': title}) for title in ('x' * 200, 'x' * 201, 'short')) + '\n'
+
+    [summary] = import_lines(client.post('/api/tasks/import', data=body, content_type='application/x-ndjson'))
+
+    assert (summary['success'], summary['imported'], summary['skipped']) == (True, 2, 1)
+    assert summary['errors'] == [{'row': 2, 'message': 'Task title can be at most 200 characters.'}]
+
+
+def test_csv_import_reports_bad_rows(app):
+    client = logged_in_client(app)
+    body = 'title,content,done\nBuy milk,,yes\n,no title,\n'
+
+    [summary] = import_lines(client.post('/api/tasks/import', data=body, content_type='text/csv'))
+
+    assert (summary['success'], summary['imported'], summary['skipped']) == (True, 1, 1)
+    assert summary['errors'] == [{'row': 2, 'message': 'Task title cannot be empty.'}]
+
+
+def test_import_needs_login(app):
+    response = app.test_client().post('/api/tasks/import', data='{"title": "x"}\n',
+                                      content_type='application/x-ndjson')
+    assert response.status_code == 401
+
+
+def test_multipart_upload_is_refused_before_anything_is_read(app):
+    client = logged_in_client(app)
+    response = client.post('/api/tasks/import', data={'file': (io.BytesIO(b'{"title": "x"}\n'), 'tasks.ndjson')},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 415
+    assert client.get('/api/tasks').get_json()['tasks'] == []
+
+
+def test_import_while_the_user_is_being_moved_fails_before_streaming(app):
+    client = logged_in_client(app)
+    mark_moving(app, client)
+
+    response = client.post('/api/tasks/import', data='{"title": "x"}\n', content_type='application/x-ndjson')
+
+    assert response.status_code == 503
+    assert response.get_json()['success'] is False
@@ -0,0 +1,6 @@
+import explain_check
+
+
+def test_every_api_query_uses_an_index():
+    """A missing or unusable index (e.g. migration 002 dropped) makes this fail."""
+    assert explain_check.main(['--users', '50']) == 0
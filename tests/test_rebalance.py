@@ -0,0 +1,179 @@
+import pytest
+
+import rebalance
+from helpers import login, migrate_all, register, rows
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    # So a handful of tasks already spans several fetchmany() batches
+    monkeypatch.setattr(rebalance, 'BATCH_SIZE', 2)
+
+
+def user_with_tasks(app, username, task_count):
+    """Register + add tasks; returns (user_id, shard name)."""
+    client = app.test_client()
+    register(client, username)
+    login(client, username)
+    for n in range(task_count):
+        client.post('/api/tasks', json={'title': f'task {n}'})
+    user_id = client.get('/api/me').get_json()['user']['id']
+    with app.app_context():
+        [entry] = rows(app.extensions['database'], 'SELECT shard FROM user_directory WHERE user_id = %s', (user_id,))
+    return user_id, entry['shard']
+
+
+def where_is(app, user_id):
+    """{shard name: (users rows, tasks rows)} for this user, plus the directory entry."""
+    shards = app.extensions['shards']
+    found = {}
+    for name, db in shards.shards.items():
+        users = rows(db, 'SELECT id FROM users WHERE id = %s', (user_id,))
+        tasks = rows(db, 'SELECT id FROM tasks WHERE user_id = %s', (user_id,))
+        if users or tasks:
+            found[name] = (len(users), len(tasks))
+    [entry] = rows(shards.directory, 'SELECT shard, moving FROM user_directory WHERE user_id = %s', (user_id,))
+    return found, entry['shard'], bool(entry['moving'])
+
+
+def other_shard(name):
+    return 'a' if name == '0' else '0'
+
+
+def test_move_user_copies_everything_and_switches_the_directory(app, small_batches):
+    user_id, src = user_with_tasks(app, 'alice', 5)
+    dst = other_shard(src)
+
+    with app.app_context():
+        assert rebalance.move_user(user_id, src, dst, grace=0) == 5
+        assert where_is(app, user_id) == ({dst: (1, 5)}, dst, False)
+
+    client = app.test_client()
+    assert login(client, 'alice').status_code == 200
+    assert len(client.get('/api/tasks').get_json()['tasks']) == 5
+
+
+def test_move_user_can_be_retried_over_a_half_finished_copy(app, small_batches):
+    user_id, src = user_with_tasks(app, 'alice', 5)
+    dst = other_shard(src)
+
+    with app.app_context():
+        # An earlier run copied the user and some tasks, then died before switching the directory
+        shards = app.extensions['shards']
+        rebalance.copy_rows(shards.shards[src], shards.shards[dst], 'users', 'id', user_id)
+        rebalance.copy_rows(shards.shards[src], shards.shards[dst], 'tasks', 'user_id', user_id)
+        shards.shards[dst].connection.commit()
+
+        assert rebalance.move_user(user_id, src, dst, grace=0) == 5
+        assert where_is(app, user_id) == ({dst: (1, 5)}, dst, False)
+
+
+def test_a_late_write_to_the_old_shard_is_not_lost(app, monkeypatch):
+    user_id, src = user_with_tasks(app, 'alice', 3)
+    dst = other_shard(src)
+    shards = app.extensions['shards']
+    real_copy = rebalance.copy_rows
+    late_ids = []
+
+    def copy_then_slow_write(src_db, dst_db, table, where_column, uid, skip_ids=frozenset()):
+        copied = real_copy(src_db, dst_db, table, where_column, uid, skip_ids)
+        if table == 'tasks' and not late_ids:
+            # A request that saw moving=False before the move started finishes its insert now
+            late_ids.append(shards.ids.next_id())
+            src_db.connection.cursor().execute(
+                'INSERT INTO tasks (id, title, content, user_id) VALUES (%s, %s, %s, %s)',
+                (late_ids[0], 'written late', '', uid)
+            )
+            src_db.connection.commit()
+        return copied
+
+    monkeypatch.setattr(rebalance, 'copy_rows', copy_then_slow_write)
+    with app.app_context():
+        assert rebalance.move_user(user_id, src, dst, grace=0) == 4
+        assert where_is(app, user_id) == ({dst: (1, 4)}, dst, False)
+        assert rows(shards.shards[dst], 'SELECT title FROM tasks WHERE id = %s', (late_ids[0],)) == \
+            [{'title': 'written late'}]
+
+
+def test_sweep_keeps_tasks_only_the_leftover_copy_has(app):
+    user_id, src = user_with_tasks(app, 'alice', 2)
+    dst = other_shard(src)
+    shards = app.extensions['shards']
+
+    with app.app_context():
+        rebalance.move_user(user_id, src, dst, grace=0)
+        # A run that died after switching the directory, with a late task still on src
+        rebalance.copy_rows(shards.shards[dst], shards.shards[src], 'users', 'id', user_id)
+        shards.shards[src].connection.cursor().execute(
+            'INSERT INTO tasks (id, title, content, user_id) VALUES (%s, %s, %s, %s)',
+            (shards.ids.next_id(), 'written late', '', user_id)
+        )
+        shards.shards[src].connection.commit()
+
+        assert rebalance.sweep_orphans() == 1
+        assert where_is(app, user_id) == ({dst: (1, 3)}, dst, False)
+
+
+def test_failed_copy_leaves_the_user_where_they_were(app, monkeypatch):
+    user_id, src = user_with_tasks(app, 'alice', 3)
+    dst = other_shard(src)
+    real_copy = rebalance.copy_rows
+
+    def copy_then_fail(src_db, dst_db, table, where_column, uid, skip_ids=frozenset()):
+        real_copy(src_db, dst_db, table, where_column, uid, skip_ids)
+        if table == 'tasks':
+            raise RuntimeError('connection lost')
+
+    monkeypatch.setattr(rebalance, 'copy_rows', copy_then_fail)
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            rebalance.move_user(user_id, src, dst, grace=0)
+        assert where_is(app, user_id) == ({src: (1, 3)}, src, False)
+
+
+def test_sweep_removes_copies_the_directory_does_not_point_at(app, small_batches):
+    alice, src = user_with_tasks(app, 'alice', 3)
+    bob, _ = user_with_tasks(app, 'bob', 2)
+    dst = other_shard(src)
+
+    with app.app_context():
+        # Moved, but deleting the old copy failed: put the old copy back
+        rebalance.move_user(alice, src, dst, grace=0)
+        shards = app.extensions['shards']
+        rebalance.copy_rows(shards.shards[dst], shards.shards[src], 'users', 'id', alice)
+        rebalance.copy_rows(shards.shards[dst], shards.shards[src], 'tasks', 'user_id', alice)
+        shards.shards[src].connection.commit()
+        assert where_is(app, alice)[0] == {src: (1, 3), dst: (1, 3)}
+
+        assert rebalance.sweep_orphans() == 1
+        assert where_is(app, alice) == ({dst: (1, 3)}, dst, False)
+        assert where_is(app, bob)[0] == {where_is(app, bob)[1]: (1, 2)}
+
+
+def test_adding_a_shard_and_rebalancing_keeps_every_user_reachable(make_app, monkeypatch, small_batches):
+    old_app = make_app('a')
+    migrate_all(old_app)
+    users = {f'user{i}': user_with_tasks(old_app, f'user{i}', 2)[0] for i in range(12)}
+
+    new_app = make_app('a', 'c')
+    migrate_all(new_app)
+    with new_app.app_context():
+        # A killed earlier run left someone stuck as `moving`
+        directory = new_app.extensions['database'].connection
+        directory.cursor().execute('UPDATE user_directory SET moving = %s WHERE user_id = %s',
+                                   (True, users['user0']))
+        directory.commit()
+
+    monkeypatch.setattr(rebalance, 'create_app', lambda: new_app)
+    rebalance.main(['--grace', '0'])
+
+    ring = new_app.extensions['shards'].ring
+    assert any(ring.get(user_id) == 'c' for user_id in users.values())
+    with new_app.app_context():
+        for user_id in users.values():
+            assert where_is(new_app, user_id) == ({ring.get(user_id): (1, 2)}, ring.get(user_id), False)
+
+    client = new_app.test_client()
+    for username in users:
+        assert login(client, username).status_code == 200
+        assert len(client.get('/api/tasks').get_json()['tasks']) == 2